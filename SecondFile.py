@@ -0,0 +1,1141 @@
+"""Access helpers for the plain-text message files kept at the repo root.
+
+The project's content lives in small text files next to this module
+(``naga``, ``naga2.0``, ``README.md``, ``branch1``, ``branch2`` and the
+numbered files ``1``-``6``).  This module loads them so a service can serve
+their lines without touching the disk on every request.
+"""
+
+import argparse
+import asyncio
+import bisect
+import difflib
+import hashlib
+import mmap
+import os
+import re
+import stat
+import struct
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+ENCODING = "utf-8"
+
+# Message files are plain names ("naga", "branch1", "1"), optionally with
+# numeric version parts ("naga2.0") or a Markdown suffix ("README.md").
+# Anything else at the root -- source, build output, editor backups such as
+# "naga~" and temporary files -- is not served.
+_MESSAGE_NAME_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9_-]*(?:\.[0-9]+)*(?:\.md)?\Z")
+
+# Names matching the pattern above that are project tooling, not messages.
+_EXCLUDED_NAMES = frozenset({"FEATURE_REQUESTS.md"})
+
+
+def is_message_file(name):
+    """Return True if ``name`` is a valid root-level message file name."""
+    return _MESSAGE_NAME_RE.match(name) is not None and name not in _EXCLUDED_NAMES
+
+
+def list_message_files(root=ROOT):
+    """Return the sorted names of the message files directly under ``root``."""
+    names = []
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_file() and is_message_file(entry.name):
+                names.append(entry.name)
+    names.sort()
+    return names
+
+
+def message_path(name, root=ROOT):
+    """Return the path of message file ``name`` directly under ``root``.
+
+    Raises ``ValueError`` unless ``name`` is a plain root-level message file
+    name, so relative (``../x``) and absolute names never escape ``root``.
+    """
+    if not isinstance(name, str) or not is_message_file(name):
+        raise ValueError("not a message file name: %r" % (name,))
+    return os.path.join(root, name)
+
+
+def line_offsets(data):
+    """Return the start offset of every line in ``data`` plus its end.
+
+    The result has one more entry than there are lines, so line ``i`` spans
+    ``data[offsets[i]:offsets[i + 1]]`` (including its trailing newline).
+    """
+    offsets = [0]
+    pos = data.find(b"\n")
+    while pos != -1:
+        offsets.append(pos + 1)
+        pos = data.find(b"\n", pos + 1)
+    if offsets[-1] != len(data):
+        offsets.append(len(data))
+    return offsets
+
+
+def _eol_end(buf, start, end):
+    """Return ``end`` moved back past a trailing ``\\n`` or ``\\r\\n``."""
+    if end > start and buf[end - 1] == 0x0A:
+        end -= 1
+        if end > start and buf[end - 1] == 0x0D:
+            end -= 1
+    return end
+
+
+def _strip_eol(raw):
+    if raw.endswith(b"\n"):
+        raw = raw[:-1]
+        if raw.endswith(b"\r"):
+            raw = raw[:-1]
+    return raw
+
+
+def split_raw_lines(data, offsets=None):
+    """Return the lines of ``data`` as bytes, without EOL.
+
+    Lines break on ``\\n`` only, with a ``\\r`` before it stripped, so every
+    API in this module numbers a file's lines the same way.  ``offsets``
+    may be passed if :func:`line_offsets` was already computed for ``data``.
+    """
+    if offsets is None:
+        offsets = line_offsets(data)
+    return [_strip_eol(data[offsets[i]:offsets[i + 1]])
+            for i in range(len(offsets) - 1)]
+
+
+def split_lines(data, offsets=None):
+    """Return the lines of ``data`` as text; see :func:`split_raw_lines`."""
+    return [raw.decode(ENCODING) for raw in split_raw_lines(data, offsets)]
+
+
+# Latency histogram bucket upper bounds, in seconds.
+LATENCY_BUCKETS = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2,
+                   5e-2, 0.1, 0.5, 1.0)
+
+
+class Metrics:
+    """Counters and latency histograms collected by the access entry points.
+
+    Only allocated while instrumentation is on (see :func:`enable_metrics`);
+    when it is off every entry point pays a single ``is None`` check.
+    Tracks calls, cache hits/misses and latency per operation, total bytes
+    read from disk and per-file access counts.
+    """
+
+    clock = staticmethod(time.perf_counter)
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Zero every counter and histogram."""
+        with self._lock:
+            self._calls = {}
+            self._hits = {}
+            self._misses = {}
+            self._latency = {}
+            self._file_accesses = {}
+            self._bytes_read = 0
+
+    def record(self, op, start, files=(), nbytes=0, hit=None):
+        """Record one call of ``op`` that began at ``start`` (a :attr:`clock` value).
+
+        ``files`` are the message files it touched, ``nbytes`` the bytes it
+        read from disk and ``hit`` whether it was served from a cache
+        (None when the operation has no cache).
+        """
+        elapsed = self.clock() - start
+        with self._lock:
+            self._calls[op] = self._calls.get(op, 0) + 1
+            if hit is not None:
+                counts = self._hits if hit else self._misses
+                counts[op] = counts.get(op, 0) + 1
+            hist = self._latency.get(op)
+            if hist is None:
+                hist = self._latency[op] = [[0] * (len(self.buckets) + 1), 0.0]
+            hist[0][bisect.bisect_left(self.buckets, elapsed)] += 1
+            hist[1] += elapsed
+            for name in files:
+                self._file_accesses[name] = self._file_accesses.get(name, 0) + 1
+            self._bytes_read += nbytes
+
+    def add_bytes(self, nbytes):
+        """Count ``nbytes`` read from disk outside of a recorded call."""
+        with self._lock:
+            self._bytes_read += nbytes
+
+    def snapshot(self):
+        """Return a point-in-time copy of every metric as plain dicts."""
+        with self._lock:
+            latency = {}
+            for op, (counts, total) in self._latency.items():
+                cumulative = 0
+                buckets = {}
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    buckets[bound] = cumulative
+                latency[op] = {"buckets": buckets, "sum": total, "count": cumulative}
+            return {
+                "calls": dict(self._calls),
+                "cache_hits": dict(self._hits),
+                "cache_misses": dict(self._misses),
+                "bytes_read": self._bytes_read,
+                "file_accesses": dict(self._file_accesses),
+                "latency_seconds": latency,
+            }
+
+    def prometheus_text(self, prefix="secondfile"):
+        """Return the metrics in the Prometheus text exposition format."""
+        snap = self.snapshot()
+        out = []
+
+        def counter(name, help_text, samples, label):
+            out.append("# HELP %s_%s %s" % (prefix, name, help_text))
+            out.append("# TYPE %s_%s counter" % (prefix, name))
+            for key, value in sorted(samples.items()):
+                out.append('%s_%s{%s="%s"} %d'
+                           % (prefix, name, label, _prom_escape(key), value))
+
+        counter("calls_total", "Entry point calls.", snap["calls"], "op")
+        counter("cache_hits_total", "Calls served from a cache.",
+                snap["cache_hits"], "op")
+        counter("cache_misses_total", "Calls that missed a cache.",
+                snap["cache_misses"], "op")
+        counter("file_accesses_total", "Accesses per message file.",
+                snap["file_accesses"], "file")
+        out.append("# HELP %s_bytes_read_total Bytes read from disk." % prefix)
+        out.append("# TYPE %s_bytes_read_total counter" % prefix)
+        out.append("%s_bytes_read_total %d" % (prefix, snap["bytes_read"]))
+        out.append("# HELP %s_latency_seconds Entry point latency." % prefix)
+        out.append("# TYPE %s_latency_seconds histogram" % prefix)
+        for op, hist in sorted(snap["latency_seconds"].items()):
+            op = _prom_escape(op)
+            for bound, count in hist["buckets"].items():
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                out.append('%s_latency_seconds_bucket{op="%s",le="%s"} %d'
+                           % (prefix, op, le, count))
+            out.append('%s_latency_seconds_sum{op="%s"} %r' % (prefix, op, hist["sum"]))
+            out.append('%s_latency_seconds_count{op="%s"} %d'
+                       % (prefix, op, hist["count"]))
+        return "\n".join(out) + "\n"
+
+
+def _prom_escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_metrics = None
+
+
+def enable_metrics(buckets=LATENCY_BUCKETS):
+    """Turn instrumentation on and return the new :class:`Metrics` collector."""
+    global _metrics
+    _metrics = Metrics(buckets)
+    return _metrics
+
+
+def disable_metrics():
+    """Turn instrumentation off; returns the collector that was active, if any."""
+    global _metrics
+    previous, _metrics = _metrics, None
+    return previous
+
+
+def get_metrics():
+    """Return the active :class:`Metrics` collector, or None when disabled."""
+    return _metrics
+
+
+class MessageIndex:
+    """In-memory index from message file name to its contents and line offsets.
+
+    The root directory is scanned once when the index is built; every file
+    is read a single time.  Afterwards :meth:`line` and :meth:`lines` are
+    answered from memory with no further file opens.
+    """
+
+    def __init__(self, root=ROOT):
+        self.root = root
+        # name -> (contents, line offsets); replaced wholesale by reload() so
+        # concurrent readers never pair one version's bytes with another's
+        # offsets.
+        self._files = {}
+        self.reload()
+
+    def reload(self):
+        """Rescan the root directory and rebuild the index."""
+        m = _metrics
+        if m is not None:
+            start = m.clock()
+        files = {}
+        for name in list_message_files(self.root):
+            with open(os.path.join(self.root, name), "rb") as fh:
+                content = fh.read()
+            files[name] = (content, line_offsets(content))
+        self._files = files
+        if m is not None:
+            m.record("index.reload", start, files,
+                     sum(len(data) for data, _ in files.values()))
+
+    def __contains__(self, name):
+        return name in self._files
+
+    def __len__(self):
+        return len(self._files)
+
+    def names(self):
+        """Return the indexed file names in sorted order."""
+        return sorted(self._files)
+
+    def line_count(self, name):
+        """Return the number of lines in ``name``."""
+        return len(self._files[name][1]) - 1
+
+    def raw_line(self, name, lineno):
+        """Return line ``lineno`` (0-based) of ``name`` as bytes, without EOL.
+
+        Raises ``KeyError`` for an unknown file and ``IndexError`` for a line
+        number outside the file.
+        """
+        m = _metrics
+        if m is not None:
+            start = m.clock()
+        data, offsets = self._files[name]
+        if lineno < 0:
+            lineno += len(offsets) - 1
+        if not 0 <= lineno < len(offsets) - 1:
+            raise IndexError("line %d out of range for %r" % (lineno, name))
+        raw = _strip_eol(data[offsets[lineno]:offsets[lineno + 1]])
+        if m is not None:
+            m.record("index.line", start, (name,))
+        return raw
+
+    def line(self, name, lineno):
+        """Return line ``lineno`` (0-based) of ``name`` as text, without EOL."""
+        return self.raw_line(name, lineno).decode(ENCODING)
+
+    def lines(self, name):
+        """Return every line of ``name`` as a list of text lines."""
+        m = _metrics
+        if m is not None:
+            start = m.clock()
+        lines = self._lines(name)
+        if m is not None:
+            m.record("index.lines", start, (name,))
+        return lines
+
+    def _lines(self, name):
+        data, offsets = self._files[name]
+        return split_lines(data, offsets)
+
+    def text(self, name):
+        """Return the full contents of ``name`` as text."""
+        m = _metrics
+        if m is not None:
+            start = m.clock()
+        text = self._files[name][0].decode(ENCODING)
+        if m is not None:
+            m.record("index.text", start, (name,))
+        return text
+
+
+_default_index = None
+
+
+def get_index():
+    """Return the shared :class:`MessageIndex` for :data:`ROOT`, building it once."""
+    global _default_index
+    if _default_index is None:
+        _default_index = MessageIndex()
+    return _default_index
+
+
+def get_line(name, lineno):
+    """Return line ``lineno`` of message file ``name`` from the shared index."""
+    return get_index().line(name, lineno)
+
+
+class MappedMessageFile:
+    """Zero-copy line access to one message file through ``mmap``.
+
+    Lines are returned as ``memoryview`` slices of the mapping, so no
+    ``bytes`` or ``str`` object is allocated per lookup; callers decode only
+    when they need text.  Empty files cannot be mapped, so they fall back to
+    a plain read and expose an empty buffer instead.
+
+    Line offsets are computed when the file is mapped.  With
+    ``auto_refresh`` (the default) every :meth:`line` and ``len()`` first
+    ``stat()``s the path and remaps it if its mtime, size or inode changed,
+    so in-place edits and atomic replacements are picked up; call
+    :meth:`refresh` yourself when it is off.  Truncating a mapped file is
+    still unsafe: a view handed out before the truncation, or a lookup
+    racing with it, touches pages past the new end of file and the process
+    receives ``SIGBUS``.  Replace message files atomically instead.
+
+    Views handed out by :meth:`line` must be released before :meth:`close`
+    is called, otherwise closing the mapping raises ``BufferError``.
+    """
+
+    def __init__(self, path, auto_refresh=True):
+        m = _metrics
+        if m is not None:
+            start = m.clock()
+        self.path = path
+        self.auto_refresh = auto_refresh
+        self._mmap = None
+        self._load()
+        if m is not None:
+            m.record("mmap.open", start, (os.path.basename(path),), len(self._view))
+
+    def _load(self):
+        with open(self.path, "rb") as fh:
+            st = os.fstat(fh.fileno())
+            if st.st_size:
+                mapping = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+                buf = mapping
+            else:
+                mapping = None
+                buf = fh.read()
+        self._sig = file_signature(st)
+        self._mmap = mapping
+        self._view = memoryview(buf)
+        self._offsets = line_offsets(buf)
+
+    def refresh(self):
+        """Remap the file if it changed since it was mapped.
+
+        Returns True if it was remapped.  The previous mapping is not closed
+        explicitly; it is unmapped once every view into it is released.
+        """
+        if file_signature(os.stat(self.path)) == self._sig:
+            return False
+        self._load()
+        return True
+
+    @property
+    def mapped(self):
+        """True if the file is backed by a memory map rather than a read."""
+        return self._mmap is not None
+
+    def __len__(self):
+        if self.auto_refresh:
+            self.refresh()
+        return len(self._offsets) - 1
+
+    def line(self, lineno):
+        """Return line ``lineno`` (0-based) as a ``memoryview``, without EOL."""
+        m = _metrics
+        if m is not None:
+            t0 = m.clock()
+        if self.auto_refresh:
+            self.refresh()
+        offsets = self._offsets
+        if lineno < 0:
+            lineno += len(offsets) - 1
+        if not 0 <= lineno < len(offsets) - 1:
+            raise IndexError("line %d out of range for %r" % (lineno, self.path))
+        start = offsets[lineno]
+        end = _eol_end(self._view, start, offsets[lineno + 1])
+        view = self._view[start:end]
+        if m is not None:
+            m.record("mmap.line", t0, (os.path.basename(self.path),))
+        return view
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.line(i)
+
+    def close(self):
+        """Release the buffer and unmap the file."""
+        self._view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_mapped(name, root=ROOT, auto_refresh=True):
+    """Return a :class:`MappedMessageFile` for message file ``name``."""
+    return MappedMessageFile(message_path(name, root), auto_refresh)
+
+
+def file_signature(st):
+    """Return the ``(mtime_ns, size, inode)`` triple identifying a file version."""
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class LineCache:
+    """Size-bounded LRU cache of parsed message file lines.
+
+    Each lookup costs a single ``stat()``; a file is only re-read when its
+    mtime, size or inode differs from the cached version, so in-place edits
+    and atomic replacements are both picked up.  Entries are evicted least
+    recently used first once the cached payload exceeds ``max_bytes``.
+    """
+
+    def __init__(self, root=ROOT, max_bytes=1 << 20):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    @property
+    def size(self):
+        """Total payload bytes currently held by the cache."""
+        return self._size
+
+    def get(self, name):
+        """Return the lines of message file ``name`` as a tuple of text lines.
+
+        Raises ``ValueError`` for a name that is not a message file name (see
+        :func:`message_path`) and ``OSError`` (typically ``FileNotFoundError``)
+        if the file cannot be read; a cached entry for it is dropped then.
+        """
+        m = _metrics
+        if m is not None:
+            start = m.clock()
+        path = message_path(name, self.root)
+        try:
+            sig = file_signature(os.stat(path))
+        except OSError:
+            self.invalidate(name)
+            raise
+        with self._lock:
+            entry = self._entries.get(name)
+            hit = entry is not None and entry[0] == sig
+            if hit:
+                self._entries.move_to_end(name)
+                self.hits += 1
+        if hit:
+            if m is not None:
+                m.record("cache.get", start, (name,), hit=True)
+            return entry[2]
+        # Store the bytes under the signature taken *before* reading: a write
+        # racing with the read then shows up as a mismatch on the next lookup
+        # instead of pinning stale lines under the new version's signature.
+        with open(path, "rb") as fh:
+            data = fh.read()
+        lines = tuple(split_lines(data))
+        with self._lock:
+            self.misses += 1
+            self._store(name, (sig, len(data), lines))
+        if m is not None:
+            m.record("cache.get", start, (name,), len(data), hit=False)
+        return lines
+
+    def _store(self, name, entry):
+        old = self._entries.pop(name, None)
+        if old is not None:
+            self._size -= old[1]
+        if entry[1] > self.max_bytes:
+            return
+        self._entries[name] = entry
+        self._size += entry[1]
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= evicted[1]
+
+    def invalidate(self, name=None):
+        """Drop ``name`` from the cache, or every entry if ``name`` is None."""
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+                self._size = 0
+            else:
+                old = self._entries.pop(name, None)
+                if old is not None:
+                    self._size -= old[1]
+
+
+FetchResult = namedtuple("FetchResult", "name status lines error")
+FetchResult.__doc__ = """Outcome of fetching one message file in a batch.
+
+``status`` is ``"ok"``, ``"empty"`` (file exists but has no lines),
+``"missing"`` or ``"error"``; ``lines`` is a tuple of text lines (empty
+unless ``status`` is ``"ok"``) and ``error`` holds the exception, if any.
+"""
+
+DEFAULT_CONCURRENCY = 8
+
+
+def fetch_one(name, root=ROOT, cache=None):
+    """Read message file ``name`` and return a :class:`FetchResult`.
+
+    Never raises for invalid names, I/O or decoding problems; they are
+    reported through the result's ``status`` and ``error`` fields.  Names
+    that are not plain root-level message file names (see
+    :func:`message_path`) are reported as ``"error"`` without being read.
+    When ``cache`` (a :class:`LineCache`) is given, it is used instead of
+    reading directly.
+    """
+    m = _metrics
+    if m is not None:
+        start = m.clock()
+    nbytes = 0
+    try:
+        if cache is not None:
+            lines = cache.get(name)
+        else:
+            with open(message_path(name, root), "rb") as fh:
+                data = fh.read()
+            nbytes = len(data)
+            lines = tuple(split_lines(data))
+    except FileNotFoundError as exc:
+        result = FetchResult(name, "missing", (), exc)
+    except (OSError, ValueError) as exc:
+        result = FetchResult(name, "error", (), exc)
+    else:
+        result = FetchResult(name, "ok" if lines else "empty", lines, None)
+    if m is not None:
+        # With a cache, LineCache.get already counted the file access.
+        m.record("fetch", start, (name,) if cache is None else (), nbytes)
+    return result
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _shared_executor():
+    """Return the module's thread pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=DEFAULT_CONCURRENCY,
+                                               thread_name_prefix="SecondFile")
+    return _executor
+
+
+def _fetch_batch(names, root, cache):
+    return [fetch_one(name, root, cache) for name in names]
+
+
+def _batches(names, max_workers):
+    size = max(1, -(-len(names) // max(1, max_workers)))
+    return [names[i:i + size] for i in range(0, len(names), size)]
+
+
+def fetch_many(names, root=ROOT, cache=None, max_workers=DEFAULT_CONCURRENCY,
+               executor=None):
+    """Fetch several message files concurrently on a thread pool.
+
+    Names are split into at most ``max_workers`` contiguous batches that are
+    read in parallel; the calling thread reads the first batch itself.
+    ``executor`` defaults to a lazily created module-level pool of
+    :data:`DEFAULT_CONCURRENCY` threads that is reused across calls.
+    Returns a list of :class:`FetchResult` in the same order as ``names``.
+
+    Each read is mostly Python work under the GIL, so for small files that
+    are already in the page cache the threads only add hand-off cost:
+    fetching ``naga``, ``naga2.0``, ``branch1`` and ``branch2`` takes about
+    160 us here against about 85 us one by one.  The pool pays off when
+    reads actually wait on storage; for hot files pass a :class:`LineCache`.
+    """
+    names = list(names)
+    batches = _batches(names, max_workers)
+    if len(batches) <= 1:
+        return _fetch_batch(names, root, cache)
+    if executor is None:
+        executor = _shared_executor()
+    futures = [executor.submit(_fetch_batch, batch, root, cache)
+               for batch in batches[1:]]
+    results = _fetch_batch(batches[0], root, cache)
+    for future in futures:
+        results.extend(future.result())
+    return results
+
+
+async def afetch_many(names, root=ROOT, cache=None, limit=DEFAULT_CONCURRENCY,
+                      executor=None):
+    """Asynchronously fetch several message files, ``limit`` batches at once.
+
+    Names are split into at most ``limit`` contiguous batches, each read on
+    ``executor`` (the shared pool used by :func:`fetch_many` by default) so
+    the event loop is never blocked.  Returns a list of
+    :class:`FetchResult` in the same order as ``names``.
+    """
+    names = list(names)
+    if not names:
+        return []
+    if executor is None:
+        executor = _shared_executor()
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(*(
+        loop.run_in_executor(executor, _fetch_batch, batch, root, cache)
+        for batch in _batches(names, limit)))
+    return [result for batch in results for result in batch]
+
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def stream_lines(name, root=ROOT, chunk_size=DEFAULT_CHUNK_SIZE, follow=False,
+                 poll_interval=0.5, stop=None):
+    """Yield the lines of message file ``name`` one at a time, without EOL.
+
+    The file is read in ``chunk_size`` blocks, so memory use is bounded by
+    the chunk size plus the longest line regardless of file length.  Without
+    ``follow`` a final line lacking a newline is yielded at end of file.
+
+    With ``follow=True`` the generator behaves like ``tail -f``: after
+    reaching the end it keeps polling every ``poll_interval`` seconds and
+    yields lines as they are appended.  A trailing partial line is held
+    back until its newline arrives, and is dropped if following stops
+    first.  If the file is truncated or replaced (different inode) it is
+    reopened from the start.  Following ends when the optional ``stop``
+    callable returns True, or when the consumer closes the generator.
+    """
+    path = message_path(name, root)
+    m = _metrics
+    if m is not None:
+        start = m.clock()
+    fh = open(path, "rb")
+    if m is not None:
+        m.record("stream.open", start, (name,))
+    try:
+        # Pieces of the current unterminated line; only each new chunk is
+        # scanned for newlines, so a long line costs linear time.
+        pending = []
+        while True:
+            chunk = fh.read(chunk_size)
+            if chunk:
+                if m is not None:
+                    m.add_bytes(len(chunk))
+                begin = 0
+                end = chunk.find(b"\n")
+                while end != -1:
+                    if pending:
+                        pending.append(chunk[begin:end])
+                        yield _decode_line(b"".join(pending))
+                        pending = []
+                    else:
+                        yield _decode_line(chunk[begin:end])
+                    begin = end + 1
+                    end = chunk.find(b"\n", begin)
+                if begin < len(chunk):
+                    pending.append(chunk[begin:])
+                continue
+            if not follow:
+                if pending:
+                    yield _decode_line(b"".join(pending))
+                return
+            if stop is not None and stop():
+                return
+            time.sleep(poll_interval)
+            if _was_rotated(fh, path):
+                fh.close()
+                fh = open(path, "rb")
+                pending = []
+    finally:
+        fh.close()
+
+
+def _decode_line(raw):
+    if raw.endswith(b"\r"):
+        raw = raw[:-1]
+    return raw.decode(ENCODING)
+
+
+def _was_rotated(fh, path):
+    """Return True if ``path`` was truncated or replaced under ``fh``."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return False
+    return st.st_ino != os.fstat(fh.fileno()).st_ino or st.st_size < fh.tell()
+
+
+# Snapshot layout (all integers little-endian):
+#   header:  magic, format version, entry count
+#   table:   one (name offset, name length, data offset, data length) per entry
+#   payload: UTF-8 file names and file contents, addressed by the table
+SNAPSHOT_NAME = "messages.pack"
+SNAPSHOT_MAGIC = b"SFPK"
+SNAPSHOT_VERSION = 1
+_SNAPSHOT_HEADER = struct.Struct("<4sHI")
+_SNAPSHOT_ENTRY = struct.Struct("<QIQQ")
+
+
+class SnapshotError(ValueError):
+    """Raised when a snapshot file is malformed or has an unknown version."""
+
+
+def build_snapshot(path=None, root=ROOT, names=None):
+    """Pack message files from ``root`` into a single snapshot at ``path``.
+
+    ``names`` defaults to every message file under ``root``.  Contents must
+    be valid UTF-8.  The snapshot is written to a hidden temporary file next
+    to ``path``, synced and moved into place, so readers never observe a
+    partial snapshot; the temporary file is removed if writing fails.
+    Returns the path written.
+    """
+    m = _metrics
+    if m is not None:
+        start = m.clock()
+    if path is None:
+        path = os.path.join(root, SNAPSHOT_NAME)
+    if names is None:
+        names = list_message_files(root)
+    blobs = []
+    for name in names:
+        with open(message_path(name, root), "rb") as fh:
+            data = fh.read()
+        data.decode(ENCODING)
+        blobs.append((name.encode(ENCODING), data))
+
+    table = []
+    offset = _SNAPSHOT_HEADER.size + _SNAPSHOT_ENTRY.size * len(blobs)
+    for name, data in blobs:
+        table.append((offset, len(name), offset + len(name), len(data)))
+        offset += len(name) + len(data)
+
+    fd, tmp_path = tempfile.mkstemp(
+        prefix="." + os.path.basename(path) + ".", suffix=".tmp",
+        dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(_SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION,
+                                            len(blobs)))
+            for entry in table:
+                out.write(_SNAPSHOT_ENTRY.pack(*entry))
+            for name, data in blobs:
+                out.write(name)
+                out.write(data)
+            out.flush()
+            # mkstemp creates the file 0600; give the snapshot the mode a
+            # plain open() would, so a service running as another user can
+            # still read it.
+            os.fchmod(out.fileno(), _snapshot_mode(path))
+            os.fsync(out.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    if m is not None:
+        m.record("snapshot.build", start, names,
+                 sum(len(data) for _, data in blobs))
+    return path
+
+
+def _snapshot_mode(path):
+    """Return the permission bits for a snapshot written to ``path``.
+
+    An existing snapshot keeps its mode; a new one gets ``0o666`` minus the
+    process umask.
+    """
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0o022)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+class Snapshot:
+    """Read-only view of a packed snapshot built by :func:`build_snapshot`.
+
+    The whole snapshot is opened once and memory-mapped, so loading costs a
+    single file descriptor no matter how many message files it contains.
+    :meth:`raw` returns zero-copy ``memoryview`` slices of the mapping.
+    """
+
+    def __init__(self, path=None):
+        if path is None:
+            path = os.path.join(ROOT, SNAPSHOT_NAME)
+        m = _metrics
+        if m is not None:
+            start = m.clock()
+        self.path = path
+        with open(path, "rb") as fh:
+            if os.fstat(fh.fileno()).st_size < _SNAPSHOT_HEADER.size:
+                raise SnapshotError("%s: truncated header" % path)
+            self._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._view = memoryview(self._mmap)
+            self._entries = self._parse()
+        except Exception:
+            self.close()
+            raise
+        if m is not None:
+            m.record("snapshot.open", start, (), len(self._mmap))
+
+    def _parse(self):
+        size = len(self._mmap)
+        magic, version, count = _SNAPSHOT_HEADER.unpack_from(self._mmap, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise SnapshotError("%s: not a message snapshot" % self.path)
+        if version != SNAPSHOT_VERSION:
+            raise SnapshotError("%s: unsupported snapshot version %d"
+                                % (self.path, version))
+        entries = {}
+        pos = _SNAPSHOT_HEADER.size
+        for _ in range(count):
+            if pos + _SNAPSHOT_ENTRY.size > size:
+                raise SnapshotError("%s: truncated offset table" % self.path)
+            name_off, name_len, data_off, data_len = \
+                _SNAPSHOT_ENTRY.unpack_from(self._mmap, pos)
+            pos += _SNAPSHOT_ENTRY.size
+            if name_off + name_len > size or data_off + data_len > size:
+                raise SnapshotError("%s: entry points past end of file" % self.path)
+            try:
+                name = self._mmap[name_off:name_off + name_len].decode(ENCODING)
+            except UnicodeDecodeError as exc:
+                raise SnapshotError("%s: entry name is not valid UTF-8"
+                                    % self.path) from exc
+            entries[name] = (data_off, data_len)
+        return entries
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def names(self):
+        """Return the packed file names in sorted order."""
+        return sorted(self._entries)
+
+    def raw(self, name):
+        """Return the contents of ``name`` as a ``memoryview`` of the mapping."""
+        m = _metrics
+        if m is not None:
+            start = m.clock()
+        offset, length = self._entries[name]
+        view = self._view[offset:offset + length]
+        if m is not None:
+            m.record("snapshot.raw", start, (name,))
+        return view
+
+    def text(self, name):
+        """Return the contents of ``name`` as text."""
+        with self.raw(name) as view:
+            return str(view, ENCODING)
+
+    def lines(self, name):
+        """Return the lines of ``name`` as a list of text lines."""
+        with self.raw(name) as view:
+            return split_lines(view.tobytes())
+
+    def close(self):
+        """Release the buffer and unmap the snapshot."""
+        view = getattr(self, "_view", None)
+        if view is not None:
+            view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+GREETING_FILES = ("naga2.0", "README.md")
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def greeting_tokens(text):
+    """Return the case-folded word tokens of ``text``, punctuation dropped."""
+    return [token.casefold() for token in _TOKEN_RE.findall(text)]
+
+
+class GreetingIndex:
+    """Precomputed map from case-folded greeting token to where it occurs.
+
+    Built once from the lines of ``names`` (by default :data:`GREETING_FILES`)
+    in ``index``, a :class:`MessageIndex`; :meth:`lookup` is then a single
+    dict probe.  Locations are ``(file name, 0-based line number)`` pairs in
+    file-then-line order.  Names that ``index`` does not hold (for example
+    with a custom root) are skipped; :attr:`names` lists the files indexed.
+    """
+
+    def __init__(self, names=GREETING_FILES, index=None):
+        if index is None:
+            index = get_index()
+        self.names = tuple(name for name in names if name in index)
+        postings = {}
+        for name in self.names:
+            for lineno, line in enumerate(index._lines(name)):
+                for token in greeting_tokens(line):
+                    locations = postings.setdefault(token, [])
+                    location = (name, lineno)
+                    if not locations or locations[-1] != location:
+                        locations.append(location)
+        self._postings = {token: tuple(locs) for token, locs in postings.items()}
+
+    def __contains__(self, word):
+        return word.casefold() in self._postings
+
+    def __len__(self):
+        return len(self._postings)
+
+    def lookup(self, word):
+        """Return the ``(file, line)`` locations of ``word``, ignoring case."""
+        m = _metrics
+        if m is not None:
+            start = m.clock()
+        locations = self._postings.get(word.casefold(), ())
+        if m is not None:
+            m.record("greeting.lookup", start)
+        return locations
+
+
+LineChange = namedtuple("LineChange", "tag a_start a_end b_start b_end")
+LineChange.__doc__ = """One changed region between two files.
+
+Ranges are 0-based and half-open, numbered like :meth:`MessageIndex.line`.
+
+``tag`` is ``"replace"``, ``"delete"`` (lines only in ``a``) or
+``"insert"`` (lines only in ``b``), as in :mod:`difflib` opcodes.
+"""
+
+
+def line_digests(data):
+    """Return a tuple with one 16-byte BLAKE2b digest per line of ``data``.
+
+    Lines are split by :func:`split_raw_lines`, so digest ``i`` belongs to
+    the line that :meth:`MessageIndex.line` returns for ``i``.
+    """
+    return tuple(hashlib.blake2b(line, digest_size=16).digest()
+                 for line in split_raw_lines(data))
+
+
+class LineDiffer:
+    """Incremental line-level comparer for marker and message files.
+
+    Each file is hashed line by line and its digests cached against its
+    ``(mtime_ns, size, inode)`` signature; comparison results are cached
+    against the signature pair.  Re-comparing files that have not changed
+    therefore costs two ``stat()`` calls and a dict lookup.  Both caches
+    are LRU-bounded by ``max_entries``.
+    """
+
+    def __init__(self, root=ROOT, max_entries=256):
+        self.root = root
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._digests = OrderedDict()
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _signature(self, name):
+        return file_signature(os.stat(message_path(name, self.root)))
+
+    def digests(self, name):
+        """Return the per-line digests of ``name``, re-hashing only on change.
+
+        Raises ``ValueError`` for a name that is not a message file name (see
+        :func:`message_path`) and ``OSError`` if the file cannot be read.
+        """
+        return self._load(name, self._signature(name), (name,))
+
+    def _load(self, name, sig, files=()):
+        # ``sig`` is taken before reading, so a write racing with the read
+        # shows up as a mismatch on the next lookup rather than pinning
+        # stale digests under the new version's signature.  ``files`` is
+        # what metrics count as accessed; compare() records its own.
+        m = _metrics
+        if m is not None:
+            start = m.clock()
+        with self._lock:
+            entry = self._digests.get(name)
+            hit = entry is not None and entry[0] == sig
+            if hit:
+                self._digests.move_to_end(name)
+        if hit:
+            if m is not None:
+                m.record("differ.digests", start, files, hit=True)
+            return entry[1]
+        with open(message_path(name, self.root), "rb") as fh:
+            data = fh.read()
+        digests = line_digests(data)
+        with self._lock:
+            self._remember(self._digests, name, (sig, digests))
+        if m is not None:
+            m.record("differ.digests", start, files, len(data), hit=False)
+        return digests
+
+    def compare(self, a, b):
+        """Return the :class:`LineChange` regions turning file ``a`` into ``b``.
+
+        An empty tuple means the files have identical lines.
+        """
+        m = _metrics
+        if m is not None:
+            start = m.clock()
+        sig_a = self._signature(a)
+        sig_b = self._signature(b)
+        key = (a, b, sig_a, sig_b)
+        with self._lock:
+            changes = self._results.get(key)
+            if changes is not None:
+                self._results.move_to_end(key)
+                self.hits += 1
+        if changes is not None:
+            if m is not None:
+                m.record("differ.compare", start, (a, b), hit=True)
+            return changes
+        matcher = difflib.SequenceMatcher(None, self._load(a, sig_a),
+                                          self._load(b, sig_b), autojunk=False)
+        changes = tuple(LineChange(*op) for op in matcher.get_opcodes()
+                        if op[0] != "equal")
+        with self._lock:
+            self.misses += 1
+            self._remember(self._results, key, changes)
+        if m is not None:
+            m.record("differ.compare", start, (a, b), hit=False)
+        return changes
+
+    def _remember(self, entries, key, value):
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="SecondFile.py",
+        description="Tools for the root-level message files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    pack = commands.add_parser("pack", help="build a packed snapshot")
+    pack.add_argument("-o", "--output",
+                      help="snapshot path (default: %s under the root)" % SNAPSHOT_NAME)
+    pack.add_argument("--root", default=ROOT,
+                      help="directory holding the message files")
+    args = parser.parse_args(argv)
+
+    if args.command == "pack":
+        path = build_snapshot(args.output, root=args.root)
+        print("wrote %s" % path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
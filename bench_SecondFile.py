@@ -0,0 +1,252 @@
+"""Benchmark harness for the message access paths in SecondFile.py.
+
+Runs every access path against the real root-level message files and
+against synthetic copies of them scaled up to ``--lines`` lines, then
+reports throughput, p50/p99 latency and peak RSS.  Each case runs in its
+own process, and the RSS delta column is the growth of that process's peak
+over its post-import baseline.  Results are printed and written to
+``bench_output.txt`` at the repo root.
+
+    python bench_SecondFile.py [--lines N] [--ops N] [--seconds S]
+"""
+
+import argparse
+import asyncio
+import itertools
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import SecondFile
+
+DEFAULT_OUTPUT = os.path.join(SecondFile.ROOT, "bench_output.txt")
+
+
+def peak_rss_kib():
+    """Return the peak resident set size of this process in KiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in KiB elsewhere.
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def percentile(sorted_samples, fraction):
+    if not sorted_samples:
+        return 0
+    index = min(len(sorted_samples) - 1, int(fraction * len(sorted_samples)))
+    return sorted_samples[index]
+
+
+def summarize(label, samples, elapsed, baseline_rss):
+    samples.sort()
+    peak = peak_rss_kib()
+    return {
+        "case": label,
+        "ops": len(samples),
+        "ops_per_sec": len(samples) / elapsed if elapsed else 0.0,
+        "p50_us": percentile(samples, 0.50) / 1e3,
+        "p99_us": percentile(samples, 0.99) / 1e3,
+        "peak_rss_kib": peak,
+        "rss_delta_kib": peak - baseline_rss,
+    }
+
+
+def measure(op, max_ops, max_seconds):
+    """Call ``op()`` up to ``max_ops`` times or for ``max_seconds``.
+
+    Returns the per-call latencies in nanoseconds and the elapsed seconds.
+    """
+    samples = []
+    clock = time.perf_counter_ns
+    deadline = clock() + int(max_seconds * 1e9)
+    start = clock()
+    for _ in range(max_ops):
+        t0 = clock()
+        op()
+        t1 = clock()
+        samples.append(t1 - t0)
+        if t1 > deadline:
+            break
+    return samples, (clock() - start) / 1e9
+
+
+async def ameasure(op, max_ops, max_seconds):
+    """Like :func:`measure`, awaiting ``op()`` inside the running event loop."""
+    samples = []
+    clock = time.perf_counter_ns
+    deadline = clock() + int(max_seconds * 1e9)
+    start = clock()
+    for _ in range(max_ops):
+        t0 = clock()
+        await op()
+        t1 = clock()
+        samples.append(t1 - t0)
+        if t1 > deadline:
+            break
+    return samples, (clock() - start) / 1e9
+
+
+def make_synthetic_root(src_root, names, lines):
+    """Copy ``names`` into a temp dir, repeating each file's lines to ``lines``.
+
+    Empty files stay empty.  Returns the temp directory path.
+    """
+    dest = tempfile.mkdtemp(prefix="secondfile-bench-")
+    for name in names:
+        with open(os.path.join(src_root, name), "rb") as fh:
+            source = fh.read().splitlines(keepends=True)
+        with open(os.path.join(dest, name), "wb") as out:
+            if not source:
+                continue
+            if not source[-1].endswith(b"\n"):
+                source[-1] += b"\n"
+            full, rest = divmod(lines, len(source))
+            block = b"".join(source)
+            for _ in range(full):
+                out.write(block)
+            out.writelines(source[:rest])
+    return dest
+
+
+def pick_targets(root, names, seed=0, count=1024):
+    """Return ``count`` random ``(file, line)`` pairs from non-empty files."""
+    rng = random.Random(seed)
+    line_counts = {}
+    for name in names:
+        with open(os.path.join(root, name), "rb") as fh:
+            line_counts[name] = sum(chunk.count(b"\n")
+                                    for chunk in iter(lambda: fh.read(1 << 20), b""))
+    populated = [name for name in names if line_counts[name]]
+    return [(name, rng.randrange(line_counts[name]))
+            for name in (rng.choice(populated) for _ in range(count))]
+
+
+def _lookup_op(lookup, targets):
+    it = itertools.cycle(targets)
+
+    def op():
+        name, lineno = next(it)
+        lookup(name, lineno)
+    return op
+
+
+def run_case(label, case, root, names, targets, max_ops, max_seconds):
+    """Set up and time one access path; meant to run in a fresh process.
+
+    Setup (building indexes, warming caches, mapping files) happens after
+    the baseline RSS is taken, so ``rss_delta_kib`` covers the memory the
+    access path itself needs.
+    """
+    baseline = peak_rss_kib()
+    batch_ops = max(1, max_ops // 100)
+    cleanup = []
+
+    if case == "plain_read":
+        def lookup(name, lineno):
+            with open(os.path.join(root, name), "rb") as fh:
+                fh.read().decode(SecondFile.ENCODING).splitlines()[lineno]
+        op = _lookup_op(lookup, targets)
+    elif case == "message_index":
+        op = _lookup_op(SecondFile.MessageIndex(root).line, targets)
+    elif case == "line_cache":
+        cache = SecondFile.LineCache(root, max_bytes=1 << 30)
+        op = _lookup_op(lambda name, lineno: cache.get(name)[lineno], targets)
+    elif case == "mmap":
+        mapped = {name: SecondFile.open_mapped(name, root) for name in names}
+        cleanup.extend(mapped.values())
+        op = _lookup_op(lambda name, lineno: mapped[name].line(lineno).release(),
+                        targets)
+    elif case == "fetch_many":
+        max_ops = batch_ops
+        op = lambda: SecondFile.fetch_many(names, root)
+    elif case == "fetch_many_cached":
+        max_ops = batch_ops
+        cache = SecondFile.LineCache(root, max_bytes=1 << 30)
+        op = lambda: SecondFile.fetch_many(names, root, cache)
+    elif case == "afetch_many":
+        async def run():
+            return await ameasure(lambda: SecondFile.afetch_many(names, root),
+                                  batch_ops, max_seconds)
+        samples, elapsed = asyncio.run(run())
+        return summarize(label, samples, elapsed, baseline)
+    else:
+        raise ValueError("unknown case %r" % case)
+
+    try:
+        samples, elapsed = measure(op, max_ops, max_seconds)
+    finally:
+        for handle in cleanup:
+            handle.close()
+    return summarize(label, samples, elapsed, baseline)
+
+
+CASES = ("plain_read", "message_index", "line_cache", "mmap",
+         "fetch_many", "fetch_many_cached", "afetch_many")
+
+
+def run_suite(label, root, names, max_ops, max_seconds, seed=0):
+    """Run every access path against the message files under ``root``.
+
+    Each case runs in its own freshly spawned process so its peak RSS is
+    not inflated by the cases before it.
+    """
+    targets = pick_targets(root, names, seed)
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for case in CASES:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results.append(pool.submit(
+                run_case, "%s/%s" % (label, case), case, root, names, targets,
+                max_ops, max_seconds).result())
+    return results
+
+
+def format_results(results, header):
+    lines = [header,
+             "%-34s %8s %14s %12s %12s %14s %14s" % (
+                 "case", "ops", "ops/sec", "p50 (us)", "p99 (us)",
+                 "peak RSS KiB", "RSS delta KiB")]
+    for r in results:
+        lines.append("%-34s %8d %14.1f %12.2f %12.2f %14d %14d" % (
+            r["case"], r["ops"], r["ops_per_sec"], r["p50_us"], r["p99_us"],
+            r["peak_rss_kib"], r["rss_delta_kib"]))
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=1_000_000,
+                        help="lines per synthetic file (0 to skip synthetic runs)")
+    parser.add_argument("--ops", type=int, default=20_000,
+                        help="maximum lookups per case")
+    parser.add_argument("--seconds", type=float, default=2.0,
+                        help="time budget per case")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT,
+                        help="results file (default: bench_output.txt)")
+    args = parser.parse_args(argv)
+
+    names = SecondFile.list_message_files()
+    results = run_suite("real", SecondFile.ROOT, names, args.ops, args.seconds)
+    if args.lines > 0:
+        synthetic_root = make_synthetic_root(SecondFile.ROOT, names, args.lines)
+        try:
+            results += run_suite("synthetic-%d" % args.lines, synthetic_root,
+                                 names, args.ops, args.seconds)
+        finally:
+            shutil.rmtree(synthetic_root)
+
+    report = format_results(results, "SecondFile benchmark: %s, python %s" % (
+        time.strftime("%Y-%m-%d %H:%M:%S"), sys.version.split()[0]))
+    with open(args.output, "w") as out:
+        out.write(report)
+    sys.stdout.write(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
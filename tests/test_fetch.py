@@ -0,0 +1,68 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import SecondFile
+
+NAMES = ["naga", "1", "nope", "../x", "naga2.0", "/etc/hostname", "branch1"]
+EXPECTED = [
+    ("naga", "ok", ("hi", "there")),
+    ("1", "empty", ()),
+    ("nope", "missing", ()),
+    ("../x", "error", ()),
+    ("naga2.0", "ok", ("HOLA",)),
+    ("/etc/hostname", "error", ()),
+    ("branch1", "ok", ("branch1",)),
+]
+
+
+@pytest.fixture
+def root(tmp_path):
+    (tmp_path / "naga").write_bytes(b"hi\nthere\n")
+    (tmp_path / "naga2.0").write_bytes(b"HOLA\n")
+    (tmp_path / "branch1").write_bytes(b"branch1\n")
+    (tmp_path / "1").write_bytes(b"")
+    (tmp_path.parent / "x").write_bytes(b"outside root\n")
+    return str(tmp_path)
+
+
+def summary(results):
+    return [(r.name, r.status, r.lines) for r in results]
+
+
+def test_fetch_one_reports_errors_without_raising(root):
+    missing = SecondFile.fetch_one("nope", root)
+    assert missing.status == "missing"
+    assert isinstance(missing.error, FileNotFoundError)
+    escaped = SecondFile.fetch_one("../x", root)
+    assert escaped.status == "error"
+    assert isinstance(escaped.error, ValueError)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2, 8])
+def test_fetch_many_keeps_input_order(root, max_workers):
+    results = SecondFile.fetch_many(NAMES, root, max_workers=max_workers)
+    assert summary(results) == EXPECTED
+
+
+def test_fetch_many_with_cache_and_executor(root):
+    cache = SecondFile.LineCache(root)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = SecondFile.fetch_many(NAMES * 3, root, cache, executor=pool)
+    assert summary(results) == EXPECTED * 3
+    assert cache.hits > 0
+
+
+def test_fetch_many_empty(root):
+    assert SecondFile.fetch_many([], root) == []
+
+
+@pytest.mark.parametrize("limit", [1, 3, 8])
+def test_afetch_many_keeps_input_order(root, limit):
+    results = asyncio.run(SecondFile.afetch_many(NAMES, root, limit=limit))
+    assert summary(results) == EXPECTED
+
+
+def test_afetch_many_empty(root):
+    assert asyncio.run(SecondFile.afetch_many([], root)) == []
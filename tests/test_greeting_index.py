@@ -0,0 +1,46 @@
+import pytest
+
+import SecondFile
+
+
+@pytest.fixture
+def index(tmp_path):
+    (tmp_path / "naga2.0").write_bytes(b"HOLA\nBONJOUR\nNamesha!!!!!!!!!!!!!!\n")
+    (tmp_path / "README.md").write_bytes(b"# Project_GIT\nhola, Hello.\n")
+    return SecondFile.MessageIndex(str(tmp_path))
+
+
+def test_lookup_is_case_folded(index):
+    greetings = SecondFile.GreetingIndex(index=index)
+    expected = (("naga2.0", 0), ("README.md", 1))
+    assert greetings.lookup("hola") == expected
+    assert greetings.lookup("HoLa") == expected
+    assert "HOLA" in greetings
+
+
+def test_punctuation_is_stripped(index):
+    greetings = SecondFile.GreetingIndex(index=index)
+    assert greetings.lookup("namesha") == (("naga2.0", 2),)
+    assert greetings.lookup("hello") == (("README.md", 1),)
+    assert greetings.lookup("project_git") == (("README.md", 0),)
+
+
+def test_unknown_token(index):
+    greetings = SecondFile.GreetingIndex(index=index)
+    assert greetings.lookup("ciao") == ()
+    assert "ciao" not in greetings
+
+
+def test_token_repeated_on_a_line_is_listed_once(tmp_path):
+    (tmp_path / "naga").write_bytes(b"hola HOLA hola\n")
+    index = SecondFile.MessageIndex(str(tmp_path))
+    greetings = SecondFile.GreetingIndex(names=("naga",), index=index)
+    assert greetings.lookup("hola") == (("naga", 0),)
+
+
+def test_missing_files_are_skipped(tmp_path):
+    (tmp_path / "README.md").write_bytes(b"hola\n")
+    index = SecondFile.MessageIndex(str(tmp_path))
+    greetings = SecondFile.GreetingIndex(index=index)
+    assert greetings.names == ("README.md",)
+    assert greetings.lookup("hola") == (("README.md", 0),)
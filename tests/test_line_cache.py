@@ -0,0 +1,110 @@
+import os
+
+import SecondFile
+
+
+def write(path, data):
+    with open(path, "wb") as fh:
+        fh.write(data)
+
+
+def bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_hit_does_not_reread(tmp_path):
+    write(tmp_path / "naga", b"hi\nthere\n")
+    cache = SecondFile.LineCache(str(tmp_path))
+    assert cache.get("naga") == ("hi", "there")
+    assert cache.get("naga") == ("hi", "there")
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_in_place_edit_same_size_is_reloaded(tmp_path):
+    path = tmp_path / "naga"
+    write(path, b"old\n")
+    cache = SecondFile.LineCache(str(tmp_path))
+    assert cache.get("naga") == ("old",)
+    with open(path, "r+b") as fh:
+        fh.write(b"new\n")
+    bump_mtime(path)
+    assert cache.get("naga") == ("new",)
+    assert cache.misses == 2
+
+
+def test_in_place_edit_size_change_is_reloaded(tmp_path):
+    path = tmp_path / "naga"
+    write(path, b"old\n")
+    cache = SecondFile.LineCache(str(tmp_path))
+    cache.get("naga")
+    with open(path, "ab") as fh:
+        fh.write(b"more\n")
+    assert cache.get("naga") == ("old", "more")
+
+
+def test_atomic_replace_is_reloaded(tmp_path):
+    path = tmp_path / "naga"
+    write(path, b"old\n")
+    cache = SecondFile.LineCache(str(tmp_path))
+    cache.get("naga")
+    old_ino = os.stat(path).st_ino
+    tmp = tmp_path / ".naga.tmp"
+    write(tmp, b"new\n")
+    st = os.stat(path)
+    os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(tmp, path)
+    assert os.stat(path).st_ino != old_ino
+    assert cache.get("naga") == ("new",)
+
+
+def test_removed_file_raises_and_is_dropped(tmp_path):
+    path = tmp_path / "naga"
+    write(path, b"hi\n")
+    cache = SecondFile.LineCache(str(tmp_path))
+    cache.get("naga")
+    os.remove(path)
+    try:
+        cache.get("naga")
+    except FileNotFoundError:
+        pass
+    else:
+        raise AssertionError("expected FileNotFoundError")
+    assert "naga" not in cache
+    assert cache.size == 0
+
+
+def test_lru_eviction_by_max_bytes(tmp_path):
+    for name in ("1", "2", "3"):
+        write(tmp_path / name, b"abcd\n")
+    cache = SecondFile.LineCache(str(tmp_path), max_bytes=10)
+    cache.get("1")
+    cache.get("2")
+    cache.get("1")
+    cache.get("3")
+    assert "2" not in cache
+    assert "1" in cache and "3" in cache
+    assert cache.size == 10
+
+
+def test_entry_larger_than_max_bytes_is_not_cached(tmp_path):
+    write(tmp_path / "naga", b"x" * 20 + b"\n")
+    cache = SecondFile.LineCache(str(tmp_path), max_bytes=10)
+    assert cache.get("naga") == ("x" * 20,)
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+def test_lines_split_like_every_other_api(tmp_path):
+    data = b"HOLA\x0cX\x1eZ\xc2\x85\nY\rW\r\n\xe2\x80\xa8last"
+    write(tmp_path / "naga", data)
+    expected = ["HOLA\x0cX\x1eZ\x85", "Y\rW", "\u2028last"]
+    cache = SecondFile.LineCache(str(tmp_path))
+    assert list(cache.get("naga")) == expected
+    assert SecondFile.split_lines(data) == expected
+    assert SecondFile.MessageIndex(str(tmp_path)).lines("naga") == expected
+    assert list(SecondFile.fetch_one("naga", str(tmp_path)).lines) == expected
+    assert list(SecondFile.stream_lines("naga", str(tmp_path))) == expected
+    path = SecondFile.build_snapshot(str(tmp_path / "messages.pack"), str(tmp_path))
+    with SecondFile.Snapshot(path) as snap:
+        assert snap.lines("naga") == expected
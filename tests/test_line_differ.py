@@ -0,0 +1,84 @@
+import pytest
+
+import SecondFile
+from SecondFile import LineChange
+
+
+@pytest.fixture
+def root(tmp_path):
+    (tmp_path / "branch1").write_bytes(b"branch1\nshared\n")
+    (tmp_path / "branch2").write_bytes(b"branch2\nshared\n")
+    (tmp_path / "1").write_bytes(b"")
+    return tmp_path
+
+
+@pytest.fixture
+def hashed(monkeypatch):
+    calls = []
+    original = SecondFile.line_digests
+
+    def counting(data):
+        calls.append(data)
+        return original(data)
+
+    monkeypatch.setattr(SecondFile, "line_digests", counting)
+    return calls
+
+
+def test_repeat_compare_is_a_cache_hit(root, hashed):
+    differ = SecondFile.LineDiffer(str(root))
+    first = differ.compare("branch1", "branch2")
+    assert first == (LineChange("replace", 0, 1, 0, 1),)
+    assert differ.compare("branch1", "branch2") == first
+    assert (differ.hits, differ.misses) == (1, 1)
+    assert len(hashed) == 2
+
+
+def test_change_rehashes_only_that_file(root, hashed):
+    differ = SecondFile.LineDiffer(str(root))
+    differ.compare("branch1", "branch2")
+    with open(root / "branch2", "ab") as fh:
+        fh.write(b"extra\n")
+    assert differ.compare("branch1", "branch2") == (
+        LineChange("replace", 0, 1, 0, 1), LineChange("insert", 2, 2, 2, 3))
+    assert hashed[2:] == [b"branch2\nshared\nextra\n"]
+    assert (differ.hits, differ.misses) == (0, 2)
+
+
+def test_delete_opcode(root):
+    (root / "naga").write_bytes(b"a\nb\nc\n")
+    (root / "naga2.0").write_bytes(b"a\nc\n")
+    differ = SecondFile.LineDiffer(str(root))
+    assert differ.compare("naga", "naga2.0") == (LineChange("delete", 1, 2, 1, 1),)
+    assert differ.compare("naga2.0", "naga") == (LineChange("insert", 1, 1, 1, 2),)
+
+
+def test_identical_files(root):
+    (root / "naga").write_bytes(b"a\nb\n")
+    (root / "naga2.0").write_bytes(b"a\r\nb")
+    differ = SecondFile.LineDiffer(str(root))
+    assert differ.compare("naga", "naga2.0") == ()
+
+
+def test_line_numbers_match_message_index(root):
+    (root / "naga").write_bytes(b"a\rb\nc\n")
+    (root / "naga2.0").write_bytes(b"a\rb\nd\n")
+    differ = SecondFile.LineDiffer(str(root))
+    assert len(differ.digests("naga")) == 2
+    assert differ.compare("naga", "naga2.0") == (LineChange("replace", 1, 2, 1, 2),)
+    assert SecondFile.MessageIndex(str(root)).line("naga", 1) == "c"
+
+
+def test_empty_file(root):
+    differ = SecondFile.LineDiffer(str(root))
+    assert differ.digests("1") == ()
+    assert differ.compare("1", "branch1") == (LineChange("insert", 0, 0, 0, 2),)
+    assert differ.compare("branch1", "1") == (LineChange("delete", 0, 2, 0, 0),)
+
+
+def test_missing_file(root):
+    differ = SecondFile.LineDiffer(str(root))
+    with pytest.raises(FileNotFoundError):
+        differ.compare("branch1", "nope")
+    with pytest.raises(ValueError):
+        differ.compare("branch1", "../branch2")
@@ -0,0 +1,107 @@
+import os
+
+import pytest
+
+import SecondFile
+
+
+def write(path, data):
+    with open(path, "wb") as fh:
+        fh.write(data)
+
+
+def bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_empty_file_falls_back_to_read(tmp_path):
+    write(tmp_path / "1", b"")
+    with SecondFile.open_mapped("1", str(tmp_path)) as mapped:
+        assert not mapped.mapped
+        assert len(mapped) == 0
+        assert list(mapped) == []
+        with pytest.raises(IndexError):
+            mapped.line(0)
+
+
+def test_lines_are_memoryviews_without_eol(tmp_path):
+    write(tmp_path / "naga", b"hi this is BEAST....\r\nwelcome\n\nlast")
+    with SecondFile.open_mapped("naga", str(tmp_path)) as mapped:
+        assert mapped.mapped
+        assert len(mapped) == 4
+        views = list(mapped)
+        assert all(isinstance(view, memoryview) for view in views)
+        assert [bytes(view) for view in views] == [
+            b"hi this is BEAST....", b"welcome", b"", b"last"]
+        assert bytes(mapped.line(-1)) == b"last"
+        for view in views:
+            view.release()
+
+
+def test_close_with_live_view_raises(tmp_path):
+    write(tmp_path / "naga", b"hello\n")
+    mapped = SecondFile.open_mapped("naga", str(tmp_path))
+    view = mapped.line(0)
+    with pytest.raises(BufferError):
+        mapped.close()
+    assert bytes(view) == b"hello"
+    view.release()
+    mapped.close()
+
+
+def test_rejects_non_message_names(tmp_path):
+    with pytest.raises(ValueError):
+        SecondFile.open_mapped("../naga", str(tmp_path))
+
+
+def test_remaps_after_in_place_edit(tmp_path):
+    path = tmp_path / "naga"
+    write(path, b"one\n")
+    with SecondFile.open_mapped("naga", str(tmp_path)) as mapped:
+        with open(path, "ab") as fh:
+            fh.write(b"two\n")
+        assert len(mapped) == 2
+        with mapped.line(1) as view:
+            assert bytes(view) == b"two"
+
+
+def test_remaps_after_same_size_edit_and_replace(tmp_path):
+    path = tmp_path / "naga"
+    write(path, b"a\nbc\n")
+    with SecondFile.open_mapped("naga", str(tmp_path)) as mapped:
+        with open(path, "r+b") as fh:
+            fh.write(b"ab\nc\n")
+        bump_mtime(path)
+        with mapped.line(0) as view:
+            assert bytes(view) == b"ab"
+        write(tmp_path / "new", b"fresh\n")
+        os.replace(tmp_path / "new", path)
+        assert len(mapped) == 1
+        with mapped.line(0) as view:
+            assert bytes(view) == b"fresh"
+
+
+def test_old_views_survive_a_remap(tmp_path):
+    path = tmp_path / "naga"
+    write(path, b"old\n")
+    with SecondFile.open_mapped("naga", str(tmp_path)) as mapped:
+        old = mapped.line(0)
+        write(tmp_path / "new", b"new line\n")
+        os.replace(tmp_path / "new", path)
+        with mapped.line(0) as view:
+            assert bytes(view) == b"new line"
+        assert bytes(old) == b"old"
+        old.release()
+
+
+def test_without_auto_refresh_offsets_stay_until_refresh(tmp_path):
+    path = tmp_path / "naga"
+    write(path, b"one\n")
+    with SecondFile.open_mapped("naga", str(tmp_path), auto_refresh=False) as mapped:
+        with open(path, "ab") as fh:
+            fh.write(b"two\n")
+        assert len(mapped) == 1
+        assert mapped.refresh()
+        assert len(mapped) == 2
+        assert not mapped.refresh()
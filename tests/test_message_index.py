@@ -0,0 +1,93 @@
+import pytest
+
+import SecondFile
+
+
+@pytest.fixture
+def index(tmp_path):
+    files = {
+        "naga": b"hi this is BEAST....\r\nwelcome to git!!!!!!\r\n",
+        "naga2.0": b"HOLA\nBONJOUR\nNamesha",
+        "README.md": b"# Project_GIT\n\nhola, Hello.\n",
+        "1": b"",
+        "naga~": b"backup\n",
+        "naga.tmp": b"temp\n",
+        ".hidden": b"hidden\n",
+        "messages.pack": b"SFPK",
+        "SecondFile.py": b"print()\n",
+        "requests.jsonl": b"{}\n",
+    }
+    for name, data in files.items():
+        (tmp_path / name).write_bytes(data)
+    (tmp_path / "tests").mkdir()
+    return SecondFile.MessageIndex(str(tmp_path))
+
+
+@pytest.mark.parametrize("name", ["naga", "naga2.0", "README.md", "1", "branch1"])
+def test_is_message_file_accepts(name):
+    assert SecondFile.is_message_file(name)
+
+
+@pytest.mark.parametrize("name", [
+    "naga~", "naga.tmp", ".naga.swp", "messages.pack", "SecondFile.py",
+    "requests.jsonl", "bench_output.txt", "FEATURE_REQUESTS.md", "../naga",
+    "/etc/hostname", "..", "",
+])
+def test_is_message_file_rejects(name):
+    assert not SecondFile.is_message_file(name)
+
+
+def test_message_path_rejects_escaping_names(tmp_path):
+    with pytest.raises(ValueError):
+        SecondFile.message_path("../naga", str(tmp_path))
+
+
+def test_scan_keeps_only_message_files(index):
+    assert index.names() == ["1", "README.md", "naga", "naga2.0"]
+    assert "naga~" not in index
+
+
+def test_crlf_is_stripped(index):
+    assert index.lines("naga") == ["hi this is BEAST....", "welcome to git!!!!!!"]
+    assert index.raw_line("naga", 0) == b"hi this is BEAST...."
+
+
+def test_last_line_without_newline(index):
+    assert index.line_count("naga2.0") == 3
+    assert index.line("naga2.0", 2) == "Namesha"
+
+
+def test_blank_lines_are_kept(index):
+    assert index.lines("README.md") == ["# Project_GIT", "", "hola, Hello."]
+
+
+def test_empty_file(index):
+    assert index.line_count("1") == 0
+    assert index.lines("1") == []
+    assert index.text("1") == ""
+    with pytest.raises(IndexError):
+        index.line("1", 0)
+
+
+def test_negative_lineno_counts_from_end(index):
+    assert index.line("naga2.0", -1) == "Namesha"
+    assert index.line("naga2.0", -3) == "HOLA"
+
+
+@pytest.mark.parametrize("lineno", [3, 100, -4])
+def test_out_of_range_lineno(index, lineno):
+    with pytest.raises(IndexError):
+        index.line("naga2.0", lineno)
+
+
+def test_unknown_file(index):
+    with pytest.raises(KeyError):
+        index.line("nope", 0)
+
+
+def test_reload_picks_up_changes(tmp_path, index):
+    (tmp_path / "naga2.0").write_bytes(b"SALUT\n")
+    (tmp_path / "branch1").write_bytes(b"branch1\n")
+    index.reload()
+    assert index.lines("naga2.0") == ["SALUT"]
+    assert "branch1" in index
@@ -0,0 +1,117 @@
+import pytest
+
+import SecondFile
+
+
+@pytest.fixture
+def metrics():
+    collector = SecondFile.enable_metrics()
+    yield collector
+    SecondFile.disable_metrics()
+
+
+@pytest.fixture
+def root(tmp_path):
+    (tmp_path / "naga").write_bytes(b"hi\nthere\n")
+    (tmp_path / "naga2.0").write_bytes(b"HOLA\n")
+    return str(tmp_path)
+
+
+def test_disabled_by_default_and_records_nothing(root):
+    assert SecondFile.get_metrics() is None
+    SecondFile.MessageIndex(root).line("naga", 0)
+    collector = SecondFile.enable_metrics()
+    try:
+        assert collector.snapshot()["calls"] == {}
+    finally:
+        assert SecondFile.disable_metrics() is collector
+    assert SecondFile.get_metrics() is None
+    assert SecondFile.disable_metrics() is None
+
+
+def test_counts_calls_files_and_bytes(metrics, root):
+    index = SecondFile.MessageIndex(root)
+    index.line("naga", 0)
+    index.lines("naga")
+    index.line("naga2.0", 0)
+    snap = metrics.snapshot()
+    assert snap["calls"] == {"index.reload": 1, "index.line": 2, "index.lines": 1}
+    assert snap["file_accesses"] == {"naga": 3, "naga2.0": 2}
+    assert snap["bytes_read"] == 14
+    assert snap["latency_seconds"]["index.line"]["count"] == 2
+
+
+def test_cache_hits_and_misses(metrics, root):
+    cache = SecondFile.LineCache(root)
+    cache.get("naga")
+    cache.get("naga")
+    snap = metrics.snapshot()
+    assert snap["cache_hits"] == {"cache.get": 1}
+    assert snap["cache_misses"] == {"cache.get": 1}
+    assert snap["bytes_read"] == 9
+
+
+def test_cached_fetch_counts_each_file_once(metrics, root):
+    cache = SecondFile.LineCache(root)
+    SecondFile.fetch_one("naga", root, cache)
+    assert metrics.snapshot()["file_accesses"] == {"naga": 1}
+    metrics.reset()
+    SecondFile.fetch_many(["naga"] * 3, root, cache)
+    assert metrics.snapshot()["file_accesses"] == {"naga": 3}
+
+
+def test_uncached_fetch_counts_file(metrics, root):
+    SecondFile.fetch_many(["naga", "naga2.0"], root)
+    snap = metrics.snapshot()
+    assert snap["file_accesses"] == {"naga": 1, "naga2.0": 1}
+    assert snap["calls"] == {"fetch": 2}
+
+
+def test_compare_counts_each_file_once(metrics, root):
+    differ = SecondFile.LineDiffer(root)
+    differ.compare("naga", "naga2.0")
+    differ.compare("naga", "naga2.0")
+    snap = metrics.snapshot()
+    assert snap["file_accesses"] == {"naga": 2, "naga2.0": 2}
+    assert snap["cache_misses"] == {"differ.compare": 1, "differ.digests": 2}
+    assert snap["cache_hits"] == {"differ.compare": 1}
+
+
+def test_histogram_buckets_are_cumulative(monkeypatch):
+    collector = SecondFile.Metrics(buckets=(0.1, 1.0))
+    now = [0.0]
+    monkeypatch.setattr(collector, "clock", lambda: now[0])
+    for elapsed in (0.05, 0.1, 0.5, 2.0):
+        now[0] = elapsed
+        collector.record("op", 0.0)
+    hist = collector.snapshot()["latency_seconds"]["op"]
+    assert hist["buckets"] == {0.1: 2, 1.0: 3, float("inf"): 4}
+    assert hist["count"] == 4
+    assert hist["sum"] == pytest.approx(2.65)
+
+
+def test_prometheus_text(monkeypatch):
+    collector = SecondFile.Metrics(buckets=(0.001, 0.5))
+    monkeypatch.setattr(collector, "clock", lambda: 0.25)
+    collector.record("index.line", 0.0, ("naga",), nbytes=7, hit=True)
+    collector.record("index.line", 0.0, ('we"ird\\na\nme',), hit=False)
+    text = collector.prometheus_text()
+    lines = text.splitlines()
+    assert text.endswith("\n")
+    assert 'secondfile_calls_total{op="index.line"} 2' in lines
+    assert 'secondfile_cache_hits_total{op="index.line"} 1' in lines
+    assert 'secondfile_cache_misses_total{op="index.line"} 1' in lines
+    assert 'secondfile_file_accesses_total{file="naga"} 1' in lines
+    assert 'secondfile_file_accesses_total{file="we\\"ird\\\\na\\nme"} 1' in lines
+    assert "secondfile_bytes_read_total 7" in lines
+    assert "# TYPE secondfile_latency_seconds histogram" in lines
+    assert 'secondfile_latency_seconds_bucket{op="index.line",le="0.001"} 0' in lines
+    assert 'secondfile_latency_seconds_bucket{op="index.line",le="0.5"} 2' in lines
+    assert 'secondfile_latency_seconds_bucket{op="index.line",le="+Inf"} 2' in lines
+    assert 'secondfile_latency_seconds_sum{op="index.line"} 0.5' in lines
+    assert 'secondfile_latency_seconds_count{op="index.line"} 2' in lines
+
+
+def test_prometheus_text_custom_prefix():
+    collector = SecondFile.Metrics()
+    assert "app_bytes_read_total 0" in collector.prometheus_text("app").splitlines()
@@ -0,0 +1,130 @@
+import os
+import stat
+import struct
+
+import pytest
+
+import SecondFile
+
+
+@pytest.fixture
+def root(tmp_path):
+    files = {
+        "README.md": "# Project_GIT\nhola, Hello.\n",
+        "naga": "hi this is BEAST....\nwhat do you think?\n",
+        "naga2.0": "HOLA\nBONJOUR\nNamesha!!\n",
+        "1": "",
+        "greet": "¡hola! ñandú\n",
+    }
+    for name, text in files.items():
+        (tmp_path / name).write_bytes(text.encode("utf-8"))
+    return tmp_path, files
+
+
+def pack(root_dir):
+    return SecondFile.build_snapshot(str(root_dir / "messages.pack"),
+                                     root=str(root_dir))
+
+
+def test_round_trip(root):
+    root_dir, files = root
+    path = pack(root_dir)
+    with SecondFile.Snapshot(path) as snap:
+        assert snap.names() == sorted(files)
+        for name, text in files.items():
+            assert snap.text(name) == text
+            assert snap.lines(name) == text.splitlines()
+            with snap.raw(name) as view:
+                assert bytes(view) == text.encode("utf-8")
+        assert "missing" not in snap
+
+
+def test_snapshot_is_not_a_message_file_and_leaves_no_temp_files(root):
+    root_dir, files = root
+    pack(root_dir)
+    pack(root_dir)
+    assert sorted(os.listdir(root_dir)) == sorted(list(files) + ["messages.pack"])
+    assert SecondFile.list_message_files(str(root_dir)) == sorted(files)
+
+
+def test_failed_build_removes_temp_file(root, monkeypatch):
+    root_dir, _ = root
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(SecondFile.os, "fsync", fail)
+    with pytest.raises(OSError):
+        pack(root_dir)
+    assert "messages.pack" not in os.listdir(root_dir)
+    assert not [n for n in os.listdir(root_dir) if n.endswith(".tmp")]
+
+
+def test_rejects_non_message_names(root):
+    root_dir, _ = root
+    with pytest.raises(ValueError):
+        SecondFile.build_snapshot(str(root_dir / "messages.pack"),
+                                  root=str(root_dir), names=["../naga"])
+
+
+def load_error(path, data):
+    path.write_bytes(data)
+    with pytest.raises(SecondFile.SnapshotError) as info:
+        SecondFile.Snapshot(str(path))
+    return str(info.value)
+
+
+@pytest.mark.parametrize("size", [0, 5])
+def test_truncated_header(tmp_path, root, size):
+    data = open(pack(root[0]), "rb").read()
+    assert "truncated header" in load_error(tmp_path / "bad.pack", data[:size])
+
+
+def test_truncated_offset_table(tmp_path, root):
+    data = open(pack(root[0]), "rb").read()
+    assert "truncated offset table" in load_error(tmp_path / "bad.pack", data[:20])
+
+
+def test_truncated_payload(tmp_path, root):
+    data = open(pack(root[0]), "rb").read()
+    assert "past end of file" in load_error(tmp_path / "bad.pack", data[:-3])
+
+
+def test_bad_magic(tmp_path, root):
+    data = open(pack(root[0]), "rb").read()
+    assert "not a message snapshot" in load_error(tmp_path / "bad.pack",
+                                                  b"XXXX" + data[4:])
+
+
+def test_bad_version(tmp_path, root):
+    data = bytearray(open(pack(root[0]), "rb").read())
+    struct.pack_into("<H", data, 4, SecondFile.SNAPSHOT_VERSION + 1)
+    assert "unsupported snapshot version" in load_error(tmp_path / "bad.pack",
+                                                        bytes(data))
+
+
+def test_bad_entry_name_encoding(tmp_path, root):
+    data = bytearray(open(pack(root[0]), "rb").read())
+    name_off = struct.unpack_from("<Q", data, struct.calcsize("<4sHI"))[0]
+    data[name_off] = 0xFF
+    assert "not valid UTF-8" in load_error(tmp_path / "bad.pack", bytes(data))
+
+
+def test_new_snapshot_gets_umask_mode(root):
+    old = os.umask(0o027)
+    try:
+        path = pack(root[0])
+    finally:
+        os.umask(old)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+
+
+def test_rebuilt_snapshot_keeps_existing_mode(root):
+    path = pack(root[0])
+    os.chmod(path, 0o644)
+    old = os.umask(0o077)
+    try:
+        pack(root[0])
+    finally:
+        os.umask(old)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
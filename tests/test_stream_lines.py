@@ -0,0 +1,94 @@
+import os
+
+import SecondFile
+
+
+def write(path, data, mode="wb"):
+    with open(path, mode) as fh:
+        fh.write(data)
+
+
+def follow(tmp_path, stop, name="naga"):
+    return SecondFile.stream_lines(name, root=str(tmp_path), chunk_size=3,
+                                   follow=True, poll_interval=0, stop=stop)
+
+
+def test_reads_all_lines_across_chunk_boundaries(tmp_path):
+    write(tmp_path / "naga", b"hi this is BEAST\r\nwelcome\n\nlast")
+    lines = list(SecondFile.stream_lines("naga", root=str(tmp_path), chunk_size=4))
+    assert lines == ["hi this is BEAST", "welcome", "", "last"]
+
+
+def test_long_line_spanning_many_chunks(tmp_path):
+    write(tmp_path / "naga", b"x" * 10000 + b"\nend\n")
+    lines = list(SecondFile.stream_lines("naga", root=str(tmp_path), chunk_size=7))
+    assert lines == ["x" * 10000, "end"]
+
+
+def test_empty_file(tmp_path):
+    write(tmp_path / "1", b"")
+    assert list(SecondFile.stream_lines("1", root=str(tmp_path))) == []
+
+
+def test_rejects_non_message_names(tmp_path):
+    try:
+        next(SecondFile.stream_lines("../naga", root=str(tmp_path)))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+
+
+def test_follow_sees_appended_lines(tmp_path):
+    path = tmp_path / "naga"
+    write(path, b"first\n")
+    gen = follow(tmp_path, stop=lambda: False)
+    assert next(gen) == "first"
+    write(path, b"second\nthird\n", "ab")
+    assert next(gen) == "second"
+    assert next(gen) == "third"
+    gen.close()
+
+
+def test_follow_holds_back_partial_line_until_newline(tmp_path):
+    path = tmp_path / "naga"
+    write(path, b"first\npar")
+    polls = []
+
+    def stop():
+        polls.append(None)
+        if len(polls) == 1:
+            write(path, b"t\n", "ab")
+        return False
+
+    gen = follow(tmp_path, stop)
+    assert next(gen) == "first"
+    assert next(gen) == "part"
+    assert len(polls) == 1
+    gen.close()
+
+
+def test_follow_drops_partial_line_when_stopped(tmp_path):
+    write(tmp_path / "naga", b"first\npart")
+    assert list(follow(tmp_path, stop=lambda: True)) == ["first"]
+
+
+def test_follow_restarts_after_truncation(tmp_path):
+    path = tmp_path / "naga"
+    write(path, b"aaaa\nbbbb\n")
+    gen = follow(tmp_path, stop=lambda: False)
+    assert [next(gen), next(gen)] == ["aaaa", "bbbb"]
+    write(path, b"new\n")
+    assert next(gen) == "new"
+    gen.close()
+
+
+def test_follow_reopens_replaced_file(tmp_path):
+    path = tmp_path / "naga"
+    write(path, b"old\n")
+    gen = follow(tmp_path, stop=lambda: False)
+    assert next(gen) == "old"
+    write(tmp_path / "replacement", b"fresh line\n")
+    os.replace(tmp_path / "replacement", path)
+    assert next(gen) == "fresh line"
+    gen.close()